@@ -1,19 +1,23 @@
 # bank_data_simulator_advanced.py
 # Simulateur de données bancaires ultra-réaliste avec patterns comportementaux
 
+import io
+import os
+import sys
 import pandas as pd
 import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import redirect_stdout
 from datetime import datetime, timedelta
-import random
 from faker import Faker
 from typing import Dict, List, Tuple
+from pathlib import Path
 import warnings
 warnings.filterwarnings('ignore')
 
-# Configuration
-fake = Faker('fr_FR')
-np.random.seed(42)
-random.seed(42)
+# Ajouter le dossier parent au path pour importer config
+sys.path.append(str(Path(__file__).parent.parent))
+from config import TABLE_DTYPES
 
 class AdvancedBankDataSimulator:
     """
@@ -27,12 +31,31 @@ class AdvancedBankDataSimulator:
     5. Types de fraude spécifiques (card testing, account takeover, etc.)
     """
     
+    # Encodages entiers (int8) des segments clients et catégories de risque commerçant
+    SEGMENTS = ['Basic', 'Standard', 'Premium', 'Private']
+    RISKS = ['low', 'medium', 'high']
+    
+    # Types de fraude (code 0 = transaction légitime)
+    FRAUD_TYPES = ['legit', 'card_testing', 'account_takeover', 'compromised_terminal',
+                   'velocity_fraud', 'geographic_anomaly']
+    
+    # Matrice de compatibilité segment-risque (lignes = SEGMENTS, colonnes = RISKS)
+    COMPAT = np.array([
+        #  low   medium  high
+        [0.9,  0.6,   0.2],   # Basic
+        [0.8,  0.9,   0.5],   # Standard
+        [0.7,  0.9,   0.8],   # Premium
+        [0.6,  0.8,   0.9],   # Private
+    ], dtype=np.float32)
+    
     def __init__(self, 
                  n_customers=50000,
                  n_merchants=5000,
                  n_transactions=500000,
                  fraud_rate=0.0018,
-                 simulation_days=180):
+                 simulation_days=180,
+                 seed=42,
+                 end_date=None):
         
         self.n_customers = n_customers
         self.n_merchants = n_merchants
@@ -40,12 +63,34 @@ class AdvancedBankDataSimulator:
         self.fraud_rate = fraud_rate
         self.simulation_days = simulation_days
         
-        # Dates de simulation
-        self.end_date = datetime.now()
+        # Générateur aléatoire unique (PCG64) : tous les tirages passent par self.rng
+        self.rng = np.random.default_rng(seed)
+        # Faker propre à l'instance, graine comprise (noms, emails, villes reproductibles)
+        self.fake = Faker('fr_FR')
+        self.fake.seed_instance(seed)
+        
+        # Coefficients saisonniers précalculés [jour, heure, mois]
+        self.SEASONAL = self._build_seasonal_table()
+        
+        # Distributions discrètes fixes : CDF calculées une fois (tirage par _sample_cdf)
+        hour_probs = np.array([0.01, 0.01, 0.01, 0.01, 0.01, 0.02,
+                               0.03, 0.05, 0.07, 0.08, 0.09, 0.10,
+                               0.09, 0.08, 0.07, 0.06, 0.07, 0.08,
+                               0.06, 0.04, 0.03, 0.02, 0.01, 0.01])
+        self._hour_cdf = self._build_cdf(hour_probs)  # Heure pondérée par saisonnalité
+        self._transaction_type_cdf = self._build_cdf([0.35, 0.25, 0.30, 0.10])
+        self._os_cdf = self._build_cdf([0.35, 0.40, 0.15, 0.10])
+        self._browser_cdf = self._build_cdf([0.30, 0.50, 0.10, 0.10])
+        self._device_type_cdf = self._build_cdf([0.65, 0.10, 0.25])
+        
+        # Dates de simulation : fin à minuit (du jour, ou de `end_date` si fourni) pour
+        # que l'heure d'exécution n'influe pas sur les tirages (même graine -> mêmes tables)
+        self.end_date = pd.Timestamp(end_date if end_date is not None else datetime.now()).normalize().to_pydatetime()
         self.start_date = self.end_date - timedelta(days=simulation_days)
         
         # Structures pour patterns avancés
-        self.customer_profiles = {}  # Historique comportemental par client
+        self.customer_arrays = {}  # Profils clients en colonnes NumPy (index = position client)
+        self.merchant_arrays = {}  # Registre commerçants en colonnes NumPy (index = position)
         self.merchant_clusters = {}  # Clusters de fraude organisée
         self.compromised_devices = set()  # Devices compromis
         
@@ -58,101 +103,188 @@ class AdvancedBankDataSimulator:
     # HELPER : Facteurs de saisonnalité
     # ========================================
     
-    def _get_seasonal_factor(self, dt: datetime) -> float:
+    @staticmethod
+    def _build_seasonal_table() -> np.ndarray:
         """
-        Calcule un coefficient de probabilité de transaction basé sur :
+        Construit la table des coefficients de probabilité de transaction basés sur :
         - Jour de la semaine (plus d'achats le samedi)
         - Heure (pic midi et soir, creux la nuit)
         - Périodes spéciales (Noël, soldes)
         
-        Returns: float entre 0.1 et 2.0
+        Le domaine est minuscule (7 × 24 × 12) : le produit des trois tables de poids
+        est calculé une seule fois, chaque coefficient devient une simple lecture.
+        
+        Returns: array float32 (7, 24, 13) indexé par [jour, heure, mois], valeurs entre 0.1 et 2.0
         """
         # 1. Facteur jour de semaine (lundi=0, dimanche=6)
-        day_weights = {
-            0: 0.9,   # Lundi
-            1: 0.95,  # Mardi
-            2: 1.0,   # Mercredi
-            3: 1.05,  # Jeudi
-            4: 1.3,   # Vendredi (sorties)
-            5: 1.6,   # Samedi (shopping)
-            6: 0.7    # Dimanche (commerces fermés)
-        }
-        day_factor = day_weights[dt.weekday()]
-        
-        # 2. Facteur horaire
-        hour = dt.hour
-        if 0 <= hour <= 5:
-            hour_factor = 0.15  # Très peu de transactions légitimes la nuit
-        elif 6 <= hour <= 8:
-            hour_factor = 0.6   # Petit-déjeuner
-        elif 9 <= hour <= 11:
-            hour_factor = 1.0   # Matin
-        elif 12 <= hour <= 14:
-            hour_factor = 1.4   # Déjeuner (pic)
-        elif 15 <= hour <= 17:
-            hour_factor = 1.1   # Après-midi
-        elif 18 <= hour <= 21:
-            hour_factor = 1.5   # Dîner/soirée (pic)
-        else:
-            hour_factor = 0.8   # Fin de soirée
-        
-        # 3. Facteur saisonnier (mois)
-        month = dt.month
-        if month == 12:
-            month_factor = 1.8  # Noël
-        elif month in [1, 7]:
-            month_factor = 1.5  # Soldes
-        elif month in [6, 7, 8]:
-            month_factor = 1.3  # Vacances d'été
-        else:
-            month_factor = 1.0
+        day_weights = np.array([
+            0.9,   # Lundi
+            0.95,  # Mardi
+            1.0,   # Mercredi
+            1.05,  # Jeudi
+            1.3,   # Vendredi (sorties)
+            1.6,   # Samedi (shopping)
+            0.7    # Dimanche (commerces fermés)
+        ])
+        
+        # 2. Facteur horaire (table indexée par heure 0-23)
+        hour_weights = np.array(
+            [0.15] * 6 +  # 0h-5h : très peu de transactions légitimes la nuit
+            [0.6] * 3 +   # 6h-8h : petit-déjeuner
+            [1.0] * 3 +   # 9h-11h : matin
+            [1.4] * 3 +   # 12h-14h : déjeuner (pic)
+            [1.1] * 3 +   # 15h-17h : après-midi
+            [1.5] * 4 +   # 18h-21h : dîner/soirée (pic)
+            [0.8] * 2     # 22h-23h : fin de soirée
+        )
+        
+        # 3. Facteur saisonnier (table indexée par mois 1-12, index 0 inutilisé)
+        month_weights = np.array([
+            1.0,
+            1.5,                          # Janvier (soldes)
+            1.0, 1.0, 1.0, 1.0,
+            1.3,                          # Juin (vacances d'été)
+            1.5,                          # Juillet (soldes)
+            1.3,                          # Août (vacances d'été)
+            1.0, 1.0, 1.0,
+            1.8                           # Décembre (Noël)
+        ])
+        
+        return (day_weights[:, None, None] * hour_weights[None, :, None]
+                * month_weights[None, None, :]).astype(np.float32)
+    
+    
+    def _get_seasonal_factor(self, dt: pd.DatetimeIndex) -> np.ndarray:
+        """
+        Coefficient saisonnier de chaque timestamp (lecture dans self.SEASONAL).
         
-        return day_factor * hour_factor * month_factor
+        Returns: array de floats entre 0.1 et 2.0
+        """
+        return self.SEASONAL[np.asarray(dt.weekday), np.asarray(dt.hour), np.asarray(dt.month)]
     
     
-    def _is_customer_merchant_compatible(self, customer: pd.Series, merchant: pd.Series) -> float:
+    def _is_customer_merchant_compatible(self, segment_codes: np.ndarray, is_pep: np.ndarray,
+                                         risk_codes: np.ndarray, mccs: np.ndarray) -> np.ndarray:
         """
         Calcule la probabilité qu'un client utilise ce commerçant (cohérence comportementale).
         
+        Vectorisé : un couple (client, commerçant) par position des arrays, segments et
+        risques encodés en int8 (index dans SEGMENTS / RISKS), MCC en int16.
+        
         Règles métier :
         - Client Premium → commerçants low/medium risk (80%)
         - Client Basic → évite commerçants Premium (électronique, voyages)
         - PEP → évite casinos, crypto
         
-        Returns: probabilité entre 0.0 et 1.0
+        Returns: array de probabilités entre 0.0 et 1.0
         """
-        segment = customer['customer_segment']
-        risk = merchant['merchant_risk_category']
-        mcc = merchant['mcc_code']
-        
-        # Matrice de compatibilité segment-risque
-        compatibility_matrix = {
-            ('Basic', 'low'): 0.9,
-            ('Basic', 'medium'): 0.6,
-            ('Basic', 'high'): 0.2,
-            ('Standard', 'low'): 0.8,
-            ('Standard', 'medium'): 0.9,
-            ('Standard', 'high'): 0.5,
-            ('Premium', 'low'): 0.7,
-            ('Premium', 'medium'): 0.9,
-            ('Premium', 'high'): 0.8,
-            ('Private', 'low'): 0.6,
-            ('Private', 'medium'): 0.8,
-            ('Private', 'high'): 0.9,
-        }
-        
-        base_prob = compatibility_matrix.get((segment, risk), 0.5)
+        # Lecture directe dans la matrice de compatibilité (fancy indexing)
+        base_prob = self.COMPAT[segment_codes, risk_codes]
         
         # Ajustements spécifiques
-        if customer['is_pep'] == 1 and mcc in ['7995', '5999']:  # Casino, crypto
-            base_prob *= 0.1  # PEP évitent les secteurs sensibles
+        base_prob[(is_pep == 1) & np.isin(mccs, [7995, 5999])] *= 0.1  # PEP évitent les secteurs sensibles (casino, crypto)
         
-        if segment == 'Basic' and mcc in ['5735', '4121']:  # Électronique, taxis
-            base_prob *= 0.3  # Pas les moyens
+        base_prob[(segment_codes == self.SEGMENTS.index('Basic')) & np.isin(mccs, [5735, 4121])] *= 0.3  # Électronique, taxis : pas les moyens
         
         return base_prob
     
     
+    @staticmethod
+    def _previous_in_group(keys: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Pour chaque ligne, position de la ligne précédente de même clé (ordre des lignes)
+        et de la première ligne de cette clé.
+        
+        Remplace le suivi séquentiel par dictionnaire (dernière transaction, pays habituel)
+        par un tri stable sur des entiers.
+        
+        Returns: (previous, first) ; previous vaut -1 pour la première ligne d'une clé
+        """
+        order = np.argsort(keys, kind='stable')
+        sorted_keys = keys[order]
+        starts_group = np.empty(len(keys), dtype=bool)
+        starts_group[:1] = True
+        starts_group[1:] = sorted_keys[1:] != sorted_keys[:-1]
+        
+        previous = np.empty(len(keys), dtype=np.int64)
+        previous[order] = np.where(starts_group, -1, np.roll(order, 1))
+        
+        group_start = np.maximum.accumulate(np.where(starts_group, np.arange(len(keys)), 0))
+        first = np.empty(len(keys), dtype=np.int64)
+        first[order] = order[group_start]
+        
+        return previous, first
+    
+    
+    # ========================================
+    # HELPER : Données synthétiques (Faker)
+    # ========================================
+    
+    def _faker_pool(self, provider, size: int, pool_size: int = 10000) -> np.ndarray:
+        """
+        Tire `size` valeurs Faker dans un pool d'au plus `pool_size` valeurs.
+        
+        Faker coûte ~50 µs par appel : le coût devient O(pool_size) au lieu de O(size).
+        """
+        pool = np.array([provider() for _ in range(min(size, pool_size))], dtype=object)
+        if size <= pool_size:
+            return pool
+        return pool[self.rng.integers(0, pool_size, size=size)]
+    
+    
+    def _random_ipv4(self, size: int) -> pd.Series:
+        """Génère `size` adresses IPv4 aléatoires (4 octets tirés en un bloc NumPy)."""
+        octets = pd.DataFrame(self.rng.integers(0, 256, size=(size, 4))).astype(str)
+        return octets[0].str.cat([octets[1], octets[2], octets[3]], sep='.')
+    
+    
+    @staticmethod
+    def _build_cdf(probs) -> np.ndarray:
+        """Fonction de répartition float32 normalisée (dernière valeur forcée à 1.0)."""
+        cdf = np.cumsum(np.asarray(probs, dtype=float) / np.sum(probs)).astype(np.float32)
+        cdf[-1] = 1.0
+        return cdf
+    
+    
+    def _sample_cdf(self, cdf: np.ndarray, size: int) -> np.ndarray:
+        """Tire `size` codes int8 selon une CDF (cf. _build_cdf) par recherche dichotomique."""
+        return np.searchsorted(cdf, self.rng.random(size, dtype=np.float32), side='right').astype(np.int8)
+    
+    
+    @staticmethod
+    def _build_alias_table(weights: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Construit la table d'alias (méthode de Walker/Vose) d'une distribution discrète.
+        
+        Construction O(n) une seule fois, puis chaque tirage coûte O(1)
+        (un index uniforme + une comparaison), sans recalculer de CDF.
+        
+        Returns: (prob, alias) à passer à _alias_sample
+        """
+        n = len(weights)
+        scaled = (np.asarray(weights, dtype=float) * n / np.sum(weights)).tolist()
+        prob = np.ones(n)
+        alias = np.arange(n)
+        
+        small = [i for i, w in enumerate(scaled) if w < 1.0]
+        large = [i for i, w in enumerate(scaled) if w >= 1.0]
+        while small and large:
+            s, l = small.pop(), large.pop()
+            prob[s] = scaled[s]
+            alias[s] = l
+            scaled[l] += scaled[s] - 1.0
+            (small if scaled[l] < 1.0 else large).append(l)
+        # Les restes (erreurs d'arrondi) gardent prob = 1
+        
+        return prob, alias
+    
+    
+    def _alias_sample(self, prob: np.ndarray, alias: np.ndarray, size: int) -> np.ndarray:
+        """Tire `size` index selon une table d'alias (cf. _build_alias_table)."""
+        idx = self.rng.integers(0, len(prob), size=size)
+        return np.where(self.rng.random(size, dtype=np.float32) < prob[idx], idx, alias[idx])
+    
+    
     # ========================================
     # TABLE 1 : CUSTOMER_PROFILE (avec behavioral traits)
     # ========================================
@@ -168,86 +300,72 @@ class AdvancedBankDataSimulator:
         """
         print("\n📋 Génération CUSTOMER_PROFILE (avec behavioral traits)...")
         
-        segments = np.random.choice(
-            ['Basic', 'Standard', 'Premium', 'Private'],
+        # Colonnes catégorielles générées directement en codes entiers (index dans SEGMENTS...)
+        segment_codes = self.rng.choice(
+            len(self.SEGMENTS),
             size=self.n_customers,
             p=[0.45, 0.40, 0.12, 0.03]
-        )
+        ).astype(np.int8)
+        is_premium_or_private = segment_codes >= self.SEGMENTS.index('Premium')
         
-        account_ages = np.random.gamma(shape=2, scale=180, size=self.n_customers)
-        account_ages = np.clip(account_ages, 30, 1825).astype(int)
+        account_ages = self.rng.gamma(shape=2, scale=180, size=self.n_customers)
+        account_ages = np.clip(account_ages, 30, 1825).astype(np.int16)
         
-        credit_scores = np.random.normal(loc=680, scale=80, size=self.n_customers)
-        credit_scores = np.clip(credit_scores, 300, 850).astype(int)
+        credit_scores = self.rng.normal(loc=680, scale=80, size=self.n_customers)
+        credit_scores = np.clip(credit_scores, 300, 850).astype(np.int16)
         
-        # Montant moyen selon segment
-        segment_avg_amounts = {
-            'Basic': (15, 25),
-            'Standard': (35, 20),
-            'Premium': (120, 60),
-            'Private': (450, 200)
-        }
+        # Montant moyen selon segment (moyenne, écart-type) — tables indexées par code segment
+        #                          Basic  Standard  Premium  Private
+        segment_avg_amount_mean = np.array([15, 35, 120, 450])
+        segment_avg_amount_std = np.array([25, 20, 60, 200])
         
-        avg_amounts = [
-            max(5, np.random.normal(segment_avg_amounts[seg][0], 
-                                   segment_avg_amounts[seg][1]))
-            for seg in segments
-        ]
+        avg_amounts = np.maximum(5, self.rng.normal(segment_avg_amount_mean[segment_codes],
+                                                     segment_avg_amount_std[segment_codes]))
         
         # NOUVEAUTÉ : Traits comportementaux
-        spending_velocities = np.random.choice(
-            ['low', 'medium', 'high'],
-            size=self.n_customers,
-            p=[0.6, 0.3, 0.1]  # La plupart sont "low velocity"
+        spending_velocities = pd.Categorical.from_codes(
+            self.rng.choice(3, size=self.n_customers, p=[0.6, 0.3, 0.1]),  # La plupart sont "low velocity"
+            categories=['low', 'medium', 'high']
         )
         
-        risk_tolerances = [
-            0.8 if seg in ['Premium', 'Private'] else 
-            0.5 if seg == 'Standard' else 0.2
-            for seg in segments
-        ]
+        risk_tolerances = np.array([0.2, 0.5, 0.8, 0.8])[segment_codes]
         
         # Plages horaires favorites (8-10, 12-14, 18-21)
-        preferred_hours = [
-            np.random.choice(['morning', 'lunch', 'evening', 'night'], 
-                           p=[0.3, 0.4, 0.25, 0.05])
-            for _ in range(self.n_customers)
-        ]
+        preferred_hours = pd.Categorical.from_codes(
+            self.rng.choice(4, size=self.n_customers, p=[0.3, 0.4, 0.25, 0.05]),
+            categories=['morning', 'lunch', 'evening', 'night']
+        )
         
         customers = pd.DataFrame({
             'customer_id': [f'CUST_{i:08d}' for i in range(1, self.n_customers + 1)],
-            'customer_name': [fake.name() for _ in range(self.n_customers)],
-            'email': [fake.email() for _ in range(self.n_customers)],
-            'customer_segment': segments,
+            'customer_name': self._faker_pool(self.fake.name, self.n_customers),
+            'email': self._faker_pool(self.fake.email, self.n_customers),
+            'customer_segment': pd.Categorical.from_codes(segment_codes, categories=self.SEGMENTS),
             'account_age_days': account_ages,
             'credit_score': credit_scores,
             'avg_transaction_amount': np.round(avg_amounts, 2),
-            'is_pep': [
-                1 if seg in ['Premium', 'Private'] and random.random() < 0.02 else 0
-                for seg in segments
-            ],
-            'active_cards': np.random.choice([1, 2, 3], size=self.n_customers, p=[0.7, 0.25, 0.05]),
-            'annual_income': [
-                int(np.random.normal(
-                    {'Basic': 25000, 'Standard': 45000, 'Premium': 85000, 'Private': 250000}[seg],
-                    {'Basic': 8000, 'Standard': 15000, 'Premium': 30000, 'Private': 100000}[seg]
-                ))
-                for seg in segments
-            ],
-            'account_opening_date': [
-                self.end_date - timedelta(days=int(age))
-                for age in account_ages
-            ],
+            'is_pep': (is_premium_or_private
+                       & (self.rng.random(self.n_customers, dtype=np.float32) < 0.02)).astype(np.int8),
+            'active_cards': self.rng.choice([1, 2, 3], size=self.n_customers, p=[0.7, 0.25, 0.05]).astype(np.int8),
+            'annual_income': self.rng.normal(
+                np.array([25000, 45000, 85000, 250000])[segment_codes],
+                np.array([8000, 15000, 30000, 100000])[segment_codes]
+            ).astype(int),
+            'account_opening_date': pd.Timestamp(self.end_date) - pd.to_timedelta(account_ages, unit='D'),
             
             # Nouveaux champs comportementaux
             'spending_velocity': spending_velocities,
             'risk_tolerance': risk_tolerances,
             'preferred_hours': preferred_hours,
-            'avg_transactions_per_week': np.random.poisson(lam=5, size=self.n_customers)
+            'avg_transactions_per_week': self.rng.poisson(lam=5, size=self.n_customers)
         })
         
-        # Sauvegarder les profils pour référence future
-        self.customer_profiles = customers.set_index('customer_id').to_dict('index')
+        # Sauvegarder les profils pour référence future (une colonne contiguë par champ)
+        self.customer_arrays = {
+            col: customers[col].to_numpy()
+            for col in ['customer_id', 'avg_transaction_amount', 'is_pep']
+        }
+        self.customer_arrays['segment_code'] = segment_codes
         
         print(f"   ✅ {len(customers):,} profils clients avec behavioral traits")
         return customers
@@ -284,35 +402,34 @@ class AdvancedBankDataSimulator:
         mcc_distribution = list(mcc_categories.keys())
         mcc_weights = [0.15, 0.12, 0.18, 0.05, 0.02, 0.08, 0.06, 0.04, 0.03, 0.10, 0.05, 0.04, 0.03, 0.03, 0.02]
         
-        merchant_mccs = np.random.choice(mcc_distribution, size=self.n_merchants, p=mcc_weights)
+        # Codes entiers : index MCC, puis catégorie et risque associés
+        mcc_codes = self.rng.choice(len(mcc_distribution), size=self.n_merchants, p=mcc_weights)
+        mcc_risk_codes = np.array([self.RISKS.index(risk) for _, risk in mcc_categories.values()], dtype=np.int8)
+        risk_codes = mcc_risk_codes[mcc_codes]
         
-        def get_chargeback_rate(risk_level):
-            if risk_level == 'low':
-                return max(0, np.random.normal(0.3, 0.15))
-            elif risk_level == 'medium':
-                return max(0, np.random.normal(0.8, 0.3))
-            else:
-                return max(0, np.random.normal(2.1, 0.8))
+        # Taux de chargeback selon le risque (moyenne, écart-type) : low, medium, high
+        chargeback_mean = np.array([0.3, 0.8, 2.1])
+        chargeback_std = np.array([0.15, 0.3, 0.8])
+        chargeback_rates = np.maximum(0, self.rng.normal(chargeback_mean[risk_codes], chargeback_std[risk_codes]))
         
         merchants = pd.DataFrame({
             'merchant_id': [f'MERCH_{i:07d}' for i in range(1, self.n_merchants + 1)],
-            'merchant_name': [fake.company() for _ in range(self.n_merchants)],
-            'mcc_code': merchant_mccs,
-            'merchant_category': [mcc_categories[mcc][0] for mcc in merchant_mccs],
-            'merchant_risk_category': [mcc_categories[mcc][1] for mcc in merchant_mccs],
-            'chargeback_rate_30d': [
-                round(get_chargeback_rate(mcc_categories[mcc][1]), 2)
-                for mcc in merchant_mccs
-            ],
-            'merchant_city': [fake.city() for _ in range(self.n_merchants)],
-            'merchant_country': np.random.choice(
-                ['FR', 'BE', 'ES', 'IT', 'GB', 'US', 'CN'],
-                size=self.n_merchants,
-                p=[0.85, 0.05, 0.03, 0.02, 0.02, 0.02, 0.01]
+            'merchant_name': self._faker_pool(self.fake.company, self.n_merchants),
+            'mcc_code': pd.Categorical.from_codes(mcc_codes, categories=mcc_distribution),
+            'merchant_category': pd.Categorical.from_codes(
+                mcc_codes, categories=[category for category, _ in mcc_categories.values()]
             ),
-            'avg_monthly_volume': np.random.lognormal(mean=9, sigma=1.5, size=self.n_merchants).astype(int),
+            'merchant_risk_category': pd.Categorical.from_codes(risk_codes, categories=self.RISKS),
+            'chargeback_rate_30d': np.round(chargeback_rates, 2),
+            'merchant_city': self._faker_pool(self.fake.city, self.n_merchants),
+            'merchant_country': pd.Categorical.from_codes(
+                self.rng.choice(7, size=self.n_merchants, p=[0.85, 0.05, 0.03, 0.02, 0.02, 0.02, 0.01]),
+                categories=['FR', 'BE', 'ES', 'IT', 'GB', 'US', 'CN']
+            ),
+            'avg_monthly_volume': self.rng.lognormal(mean=9, sigma=1.5, size=self.n_merchants).astype(int),
             'registration_date': [
-                fake.date_between(start_date='-5y', end_date='today')
+                self.fake.date_between(start_date=self.end_date.date() - timedelta(days=5 * 365),
+                                       end_date=self.end_date.date())
                 for _ in range(self.n_merchants)
             ]
         })
@@ -320,12 +437,30 @@ class AdvancedBankDataSimulator:
         # NOUVEAUTÉ : Créer des clusters de fraude (terminaux compromis)
         # 0.5% des commerçants sont compromis
         n_compromised = int(self.n_merchants * 0.005)
-        compromised_idx = np.random.choice(merchants.index, size=n_compromised, replace=False)
-        merchants['is_compromised'] = 0
-        merchants.loc[compromised_idx, 'is_compromised'] = 1
+        is_compromised = np.zeros(self.n_merchants, dtype=np.bool_)  # Indicateur par position commerçant
+        is_compromised[self.rng.choice(self.n_merchants, size=n_compromised, replace=False)] = True
+        merchants['is_compromised'] = is_compromised.astype(int)
+        
+        # Sauvegarder les colonnes utilisées par la génération des transactions
+        self.merchant_arrays = {
+            'merchant_id': merchants['merchant_id'].to_numpy(),
+            'merchant_city': merchants['merchant_city'].to_numpy(),
+            # Colonnes catégorielles : pd.Categorical, indexables par position
+            'mcc_code': merchants['mcc_code'].array,
+            'merchant_risk_category': merchants['merchant_risk_category'].array,
+            'merchant_country': merchants['merchant_country'].array,
+            # Codes entiers pour les calculs (compatibilité, filtres)
+            'risk_code': risk_codes,
+            'mcc': np.array(mcc_distribution, dtype=np.int16)[mcc_codes],
+            # Sous-ensembles ciblés par les patterns de fraude (positions, calculées une fois)
+            'foreign_idx': np.flatnonzero(merchants['merchant_country'].to_numpy() != 'FR').astype(np.int32),
+            'high_risk_idx': np.flatnonzero(risk_codes == self.RISKS.index('high')).astype(np.int32),
+            # Indicateur par position (lecture O(1) via merch_idx)
+            'is_compromised': is_compromised,
+        }
         
         # Sauvegarder les clusters
-        self.merchant_clusters['compromised'] = merchants[merchants['is_compromised'] == 1]['merchant_id'].tolist()
+        self.merchant_clusters['compromised'] = self.merchant_arrays['merchant_id'][is_compromised].tolist()
         
         print(f"   ✅ {len(merchants):,} commerçants générés")
         print(f"   🔴 {n_compromised} terminaux compromis identifiés (fraude organisée)")
@@ -350,177 +485,184 @@ class AdvancedBankDataSimulator:
         """
         print("\n💳 Génération TRANSACTIONS AVANCÉE (patterns comportementaux)...")
         
-        transactions = []
-        customer_last_txn = {}  # Tracking de la dernière transaction par client
-        customer_countries = {}  # Pays habituels par client
+        # Génération vectorisée : chaque étape porte sur les n_transactions candidates
+        # d'un bloc (arrays NumPy) au lieu d'une itération Python par transaction.
+        # Les champs clients/commerçants sont lus sur les colonnes SoA construites par
+        # generate_customer_profile / generate_merchant_registry.
+        n_candidates = self.n_transactions
+        cust = self.customer_arrays
+        merch = self.merchant_arrays
         
         # Identification des fraudeurs (1% comptes compromis)
         n_fraudsters = int(self.n_customers * 0.01)
-        fraudster_ids = np.random.choice(customers['customer_id'].values, size=n_fraudsters, replace=False)
-        fraudster_set = set(fraudster_ids)
-        
-        for i in range(self.n_transactions):
-            # 1. Génération timestamp avec saisonnalité
-            days_ago = np.random.exponential(scale=30)
-            days_ago = min(days_ago, self.simulation_days)
-            
-            # Heure pondérée par saisonnalité
-            hour_probs = [0.01, 0.01, 0.01, 0.01, 0.01, 0.02,
-                         0.03, 0.05, 0.07, 0.08, 0.09, 0.10,
-                         0.09, 0.08, 0.07, 0.06, 0.07, 0.08,
-                         0.06, 0.04, 0.03, 0.02, 0.01, 0.01]
-            
-            # 2. Normalise pour forcer la somme à 1.0
-            hour_probs = np.array(hour_probs)
-            hour_probs /= hour_probs.sum()
-            
-            # Force la conversion en int() pour éviter le conflit avec timedelta
-            hour = int(np.random.choice(range(24), p=hour_probs))
-            
-            txn_timestamp = self.end_date - timedelta(
-                days=float(days_ago), # Par sécurité, timedelta gère bien les floats pour days
-                hours=hour,
-                minutes=int(np.random.randint(0, 60)),
-                seconds=int(np.random.randint(0, 60))
+        is_fraudster = np.zeros(self.n_customers, dtype=np.bool_)  # Indicateur par position client
+        is_fraudster[self.rng.choice(self.n_customers, size=n_fraudsters, replace=False)] = True
+        
+        # 1. Génération timestamp avec saisonnalité
+        days_ago = np.minimum(self.rng.exponential(scale=30, size=n_candidates), self.simulation_days)
+        
+        # Heure pondérée par saisonnalité
+        hours = self._sample_cdf(self._hour_cdf, n_candidates).astype(np.int64)
+        minutes = self.rng.integers(0, 60, size=n_candidates)
+        seconds = self.rng.integers(0, 60, size=n_candidates)
+        
+        txn_timestamps = (
+            pd.Timestamp(self.end_date)
+            - pd.to_timedelta(days_ago, unit='D')
+            - pd.to_timedelta(hours * 3600 + minutes * 60 + seconds, unit='s')
+        ).as_unit('us')
+        
+        # Appliquer facteur saisonnier (skip transaction si hors période)
+        seasonal_factor = self._get_seasonal_factor(txn_timestamps)
+        kept = np.flatnonzero(self.rng.random(n_candidates, dtype=np.float32) <= seasonal_factor / 2.0)  # Normalisation
+        txn_timestamps = txn_timestamps[kept]
+        n = len(kept)
+        
+        # 2. Sélection client (pondérée par le montant moyen, tirage par table d'alias)
+        cust_prob, cust_alias = self._build_alias_table(cust['avg_transaction_amount'])
+        cust_idx = self._alias_sample(cust_prob, cust_alias, n)
+        cust_ids = cust['customer_id'][cust_idx]
+        cust_segment_code = cust['segment_code'][cust_idx]
+        cust_avg_amount = cust['avg_transaction_amount'][cust_idx]
+        cust_is_pep = cust['is_pep'][cust_idx]
+        
+        # 3. Sélection commerçant avec compatibilité (5 tentatives max, comme un client réel)
+        merch_risk = merch['merchant_risk_category']
+        merch_risk_code = merch['risk_code']
+        merch_mcc = merch['mcc_code']
+        merch_country = merch['merchant_country']
+        n_merchants = len(merch['merchant_id'])
+        merch_idx = np.empty(n, dtype=int)
+        pending = np.arange(n)
+        for _ in range(5):
+            merch_idx[pending] = self.rng.integers(0, n_merchants, size=len(pending))
+            compatibility = self._is_customer_merchant_compatible(
+                cust_segment_code[pending], cust_is_pep[pending],
+                merch_risk_code[merch_idx[pending]], merch['mcc'][merch_idx[pending]]
             )
-            
-            # Appliquer facteur saisonnier (skip transaction si hors période)
-            seasonal_factor = self._get_seasonal_factor(txn_timestamp)
-            if random.random() > seasonal_factor / 2.0:  # Normalisation
-                continue
-            
-            # 2. Sélection client
-            customer = customers.sample(1, weights=customers['avg_transaction_amount']).iloc[0]
-            customer_id = customer['customer_id']
-            
-            # 3. Sélection commerçant avec compatibilité
-            attempts = 0
-            while attempts < 5:
-                merchant = merchants.sample(1).iloc[0]
-                compatibility = self._is_customer_merchant_compatible(customer, merchant)
-                if random.random() < compatibility:
-                    break
-                attempts += 1
-            
-            # 4. Détection des patterns de fraude
-            is_fraud = 0
-            fraud_type = 'legit'
-            detection_delay = None
-            
-            # PATTERN A : Card Testing (0.05% des transactions)
-            if random.random() < 0.0005:
-                is_fraud = 1
-                fraud_type = 'card_testing'
-                amount = round(random.uniform(0.5, 4.99), 2)
-                # Forcer commerçant étranger
-                foreign_merchants = merchants[merchants['merchant_country'] != 'FR']
-                if len(foreign_merchants) > 0:
-                    merchant = foreign_merchants.sample(1).iloc[0]
-                detection_delay = random.randint(1, 3)  # Détecté rapidement
-            
-            # PATTERN B : Account Takeover (0.12% - clients Premium/Private)
-            elif (customer_id in fraudster_set and 
-                  customer['customer_segment'] in ['Premium', 'Private'] and 
-                  random.random() < 0.15):
-                is_fraud = 1
-                fraud_type = 'account_takeover'
-                amount = round(random.uniform(1000, 5000), 2)
-                # Montants souvent ronds
-                if random.random() < 0.4:
-                    amount = round(amount / 100) * 100
-                # Forcer commerçant high-risk
-                high_risk = merchants[merchants['merchant_risk_category'] == 'high']
-                if len(high_risk) > 0:
-                    merchant = high_risk.sample(1).iloc[0]
-                detection_delay = random.randint(7, 45)  # Plus long à détecter
-            
-            # PATTERN C : Compromised Terminal (70% de fraude sur ces terminaux)
-            elif merchant['merchant_id'] in self.merchant_clusters['compromised']:
-                if random.random() < 0.7:
-                    is_fraud = 1
-                    fraud_type = 'compromised_terminal'
-                    amount = round(max(10, np.random.normal(customer['avg_transaction_amount'], 30)), 2)
-                    detection_delay = random.randint(14, 60)
-                else:
-                    amount = round(max(1, np.random.normal(customer['avg_transaction_amount'], 15)), 2)
-            
-            # PATTERN D : Velocity Fraud (achats très rapprochés)
-            elif customer_id in customer_last_txn:
-                last_txn_time = customer_last_txn[customer_id]
-                time_diff = (txn_timestamp - last_txn_time).total_seconds() / 60  # minutes
-                
-                if time_diff < 5 and random.random() < 0.3:  # 2 achats en 5min = suspect
-                    is_fraud = 1
-                    fraud_type = 'velocity_fraud'
-                    amount = round(random.uniform(50, 300), 2)
-                    detection_delay = random.randint(1, 7)
-                else:
-                    amount = round(max(1, np.random.normal(customer['avg_transaction_amount'], 15)), 2)
-            
-            # PATTERN E : Geographic Anomaly
-            elif customer_id in customer_countries:
-                usual_country = customer_countries[customer_id]
-                if merchant['merchant_country'] != usual_country and merchant['merchant_country'] != 'FR':
-                    if random.random() < 0.15:  # 15% de ces changements sont frauduleux
-                        is_fraud = 1
-                        fraud_type = 'geographic_anomaly'
-                        amount = round(random.uniform(100, 800), 2)
-                        detection_delay = random.randint(3, 21)
-                    else:
-                        amount = round(max(1, np.random.normal(customer['avg_transaction_amount'], 15)), 2)
-                else:
-                    amount = round(max(1, np.random.normal(customer['avg_transaction_amount'], 15)), 2)
-            
-            # Transaction normale
-            else:
-                amount = round(max(1, np.random.normal(customer['avg_transaction_amount'], 15)), 2)
-            
-            # Mise à jour tracking client
-            customer_last_txn[customer_id] = txn_timestamp
-            if customer_id not in customer_countries:
-                customer_countries[customer_id] = merchant['merchant_country']
-            
-            # Statut transaction
-            if is_fraud and random.random() < 0.15:  # 15% des fraudes sont bloquées immédiatement
-                status = 'declined'
-            elif not is_fraud and random.random() < 0.02:  # 2% faux positifs
-                status = 'declined'
-            else:
-                status = 'approved'
-            
-            transactions.append({
-                'transaction_id': f'TXN_{i+1:010d}',
-                'customer_id': customer_id,
-                'merchant_id': merchant['merchant_id'],
-                'transaction_timestamp': txn_timestamp,
-                'amount': amount,
-                'currency': 'EUR',
-                'mcc_code': merchant['mcc_code'],
-                'merchant_country': merchant['merchant_country'],
-                'merchant_city': merchant['merchant_city'],
-                'transaction_type': np.random.choice(
-                    ['card_present', 'card_not_present', 'contactless', 'online'],
-                    p=[0.35, 0.25, 0.30, 0.10]
-                ),
-                'is_international': 1 if merchant['merchant_country'] != 'FR' else 0,
-                'is_fraud': is_fraud,
-                'fraud_type': fraud_type,
-                'detection_delay_days': detection_delay,
-                'transaction_status': status,
-                'merchant_risk_category': merchant['merchant_risk_category']
-            })
-            
-            # Progression
-            if (len(transactions) % 50000 == 0 and len(transactions) > 0):
-                fraud_count = sum(t['is_fraud'] for t in transactions)
-                print(f"   ⏳ {len(transactions):,} transactions | {fraud_count} fraudes")
-        
-        df_transactions = pd.DataFrame(transactions)
+            pending = pending[self.rng.random(len(pending), dtype=np.float32) >= compatibility]
+            if len(pending) == 0:
+                break
+        
+        # 4. Détection des patterns de fraude (masques évalués dans l'ordre de priorité)
+        remaining = np.ones(n, dtype=bool)
+        # Un seul tirage uniforme (7, n) pour toutes les décisions aléatoires, une ligne par décision
+        (card_testing_draw, takeover_draw, compromised_draw, velocity_draw,
+         geographic_draw, round_amount_draw, declined_draw) = self.rng.random((7, n), dtype=np.float32)
+        
+        # PATTERN A : Card Testing (0.05% des transactions)
+        is_card_testing = card_testing_draw < 0.0005
+        remaining &= ~is_card_testing
+        # Forcer commerçant étranger
+        foreign_idx = merch['foreign_idx']
+        if len(foreign_idx) > 0:
+            merch_idx[is_card_testing] = self.rng.choice(foreign_idx, size=is_card_testing.sum())
+        
+        # PATTERN B : Account Takeover (0.12% - clients Premium/Private)
+        is_takeover = (remaining
+                       & is_fraudster[cust_idx]
+                       & (cust_segment_code >= self.SEGMENTS.index('Premium'))  # Premium/Private
+                       & (takeover_draw < 0.15))
+        remaining &= ~is_takeover
+        # Forcer commerçant high-risk
+        high_risk_idx = merch['high_risk_idx']
+        if len(high_risk_idx) > 0:
+            merch_idx[is_takeover] = self.rng.choice(high_risk_idx, size=is_takeover.sum())
+        
+        # PATTERN C : Compromised Terminal (70% de fraude sur ces terminaux)
+        on_compromised = remaining & merch['is_compromised'][merch_idx]
+        remaining &= ~on_compromised
+        is_compromised_fraud = on_compromised & (compromised_draw < 0.7)
+        
+        # Tracking client : transaction précédente (ordre de génération) et pays habituel
+        # (pays du commerçant de la première transaction du client)
+        txn_country = merch_country[merch_idx]
+        previous_txn, first_txn = self._previous_in_group(cust_idx)
+        has_previous = previous_txn >= 0
+        usual_country = txn_country[first_txn]
+        
+        # PATTERN D : Velocity Fraud (achats très rapprochés)
+        velocity_candidates = remaining & has_previous
+        remaining &= ~has_previous
+        txn_time_us = txn_timestamps.asi8  # int64 (microsecondes)
+        time_diff = (txn_time_us - txn_time_us[previous_txn]) / 60e6  # minutes
+        is_velocity = velocity_candidates & (time_diff < 5) & (velocity_draw < 0.3)  # 2 achats en 5min = suspect
+        
+        # PATTERN E : Geographic Anomaly
+        # NB : le pays habituel est connu dès qu'une transaction précédente existe ; ce
+        # motif reste donc masqué par le pattern D, comme dans la version séquentielle.
+        geo_candidates = (remaining & has_previous
+                          & (txn_country != usual_country) & (txn_country != 'FR'))
+        is_geographic = geo_candidates & (geographic_draw < 0.15)  # 15% de ces changements sont frauduleux
+        
+        # Montants : un tirage par pattern, sélectionné par masque
+        normal_amount = np.round(np.maximum(1, self.rng.normal(cust_avg_amount, 15)), 2)
+        takeover_amount = np.round(self.rng.uniform(1000, 5000, size=n), 2)
+        round_amount = round_amount_draw < 0.4  # Montants souvent ronds
+        takeover_amount[round_amount] = np.round(takeover_amount[round_amount] / 100) * 100
+        
+        amount = np.select(
+            [is_card_testing, is_takeover, is_compromised_fraud, is_velocity, is_geographic],
+            [
+                np.round(self.rng.uniform(0.5, 4.99, size=n), 2),
+                takeover_amount,
+                np.round(np.maximum(10, self.rng.normal(cust_avg_amount, 30)), 2),
+                np.round(self.rng.uniform(50, 300, size=n), 2),
+                np.round(self.rng.uniform(100, 800, size=n), 2),
+            ],
+            default=normal_amount
+        )
+        fraud_type_code = np.select(
+            [is_card_testing, is_takeover, is_compromised_fraud, is_velocity, is_geographic],
+            [1, 2, 3, 4, 5],  # index dans FRAUD_TYPES
+            default=0
+        ).astype(np.int8)
+        detection_delay = np.select(
+            [is_card_testing, is_takeover, is_compromised_fraud, is_velocity, is_geographic],
+            [
+                self.rng.integers(1, 4, size=n),    # Détecté rapidement
+                self.rng.integers(7, 46, size=n),   # Plus long à détecter
+                self.rng.integers(14, 61, size=n),
+                self.rng.integers(1, 8, size=n),
+                self.rng.integers(3, 22, size=n),
+            ],
+            default=-1
+        ).astype(np.int16)
+        is_fraud = (fraud_type_code != 0).astype(np.int8)
+        
+        # Statut transaction
+        # 15% des fraudes sont bloquées immédiatement, 2% de faux positifs
+        declined = declined_draw < np.where(is_fraud == 1, 0.15, 0.02)
+        
+        df_transactions = pd.DataFrame({
+            'transaction_id': [f'TXN_{i+1:010d}' for i in kept],
+            'customer_id': cust_ids,
+            'merchant_id': merch['merchant_id'][merch_idx],
+            'transaction_timestamp': txn_timestamps,
+            'amount': amount.astype(np.float32),
+            'currency': 'EUR',
+            'mcc_code': merch_mcc[merch_idx],
+            'merchant_country': txn_country,
+            'merchant_city': merch['merchant_city'][merch_idx],
+            'transaction_type': pd.Categorical.from_codes(
+                self._sample_cdf(self._transaction_type_cdf, n),
+                categories=['card_present', 'card_not_present', 'contactless', 'online']
+            ),
+            'is_international': (txn_country != 'FR').astype(np.int8),
+            'is_fraud': is_fraud,
+            'fraud_type': pd.Categorical.from_codes(fraud_type_code, categories=self.FRAUD_TYPES),
+            # Entier nullable : pas de délai (NA) pour les transactions légitimes
+            'detection_delay_days': pd.arrays.IntegerArray(detection_delay, mask=is_fraud == 0),
+            'transaction_status': pd.Categorical.from_codes(declined.astype(np.int8),
+                                                            categories=['approved', 'declined']),
+            'merchant_risk_category': merch_risk[merch_idx]
+        })
         
         # Statistiques finales
         print(f"\n   ✅ {len(df_transactions):,} transactions générées")
         print(f"   🚨 Fraudes par type :")
-        for fraud_type in df_transactions[df_transactions['is_fraud'] == 1]['fraud_type'].value_counts().items():
+        fraud_counts = df_transactions[df_transactions['is_fraud'] == 1]['fraud_type'].value_counts()
+        for fraud_type in fraud_counts[fraud_counts > 0].items():  # Catégories non observées exclues
             print(f"      • {fraud_type[0]}: {fraud_type[1]}")
         print(f"   💰 Montant total fraudé : {df_transactions[df_transactions['is_fraud']==1]['amount'].sum():,.2f}€")
         print(f"   ⏱️  Délai moyen de détection : {df_transactions[df_transactions['is_fraud']==1]['detection_delay_days'].mean():.1f} jours")
@@ -538,79 +680,92 @@ class AdvancedBankDataSimulator:
         """
         print("\n📱 Génération DEVICE_FINGERPRINTING (réseau de fraude)...")
         
-        devices = []
+        n = len(transactions)
+        cust_ids = transactions['customer_id'].tolist()
+        is_fraud = transactions['is_fraud'].to_numpy() == 1
+        is_takeover = (transactions['fraud_type'].to_numpy() == 'account_takeover').tolist()
+        
+        # Tirages aléatoires en bloc (une valeur par transaction, consommée si besoin)
+        os_choices = ['iOS', 'Android', 'Windows', 'MacOS']
+        browser_choices = ['Safari', 'Chrome', 'Firefox', 'Edge']
+        os_array, browser_array = np.array(os_choices, dtype=object), np.array(browser_choices, dtype=object)
+        initial_os = os_array[self._sample_cdf(self._os_cdf, n)].tolist()
+        initial_browser = browser_array[self._sample_cdf(self._browser_cdf, n)].tolist()
+        changed_os = os_array[self.rng.integers(0, len(os_choices), size=n)].tolist()
+        changed_browser = browser_array[self.rng.integers(0, len(browser_choices), size=n)].tolist()
+        changed_device_num = self.rng.integers(100000, 1000000, size=n).tolist()
+        # Un seul tirage uniforme (6, n) pour toutes les décisions aléatoires
+        (takeover_draw, reuse_draw, reuse_pick,
+         change_draw, vpn_draw, emulator_draw) = self.rng.random((6, n), dtype=np.float32)
+        takeover_draw, reuse_draw, reuse_pick = takeover_draw.tolist(), reuse_draw.tolist(), reuse_pick.tolist()
+        device_changed = change_draw < 0.05  # Changement de device (suspect si fréquent)
+        device_changed_list = device_changed.tolist()
+        
+        # Passe séquentielle minimale : seul l'état device par client en dépend
         customer_devices = {}
-        device_usage_count = {}  # Tracking du nombre d'utilisateurs par device
+        compromised_devices = sorted(self.compromised_devices)
+        device_ids = [None] * n
+        device_os = [None] * n
+        device_browser = [None] * n
         
-        for _, txn in transactions.iterrows():
-            customer_id = txn['customer_id']
+        for i in range(n):
+            customer_id = cust_ids[i]
             
-            # Initialisation device pour nouveau client
-            if customer_id not in customer_devices:
-                customer_devices[customer_id] = {
-                    'device_id': f'DEV_{len(customer_devices):08d}',
-                    'os': np.random.choice(['iOS', 'Android', 'Windows', 'MacOS'], p=[0.35, 0.40, 0.15, 0.10]),
-                    'browser': np.random.choice(['Safari', 'Chrome', 'Firefox', 'Edge'], p=[0.30, 0.50, 0.10, 0.10])
-                }
+            # Initialisation device pour nouveau client : [device_id, os, browser]
+            current_device = customer_devices.get(customer_id)
+            if current_device is None:
+                current_device = [f'DEV_{len(customer_devices):08d}', initial_os[i], initial_browser[i]]
+                customer_devices[customer_id] = current_device
             
             # Pattern : Fraude organisée = même device pour plusieurs clients
-            if txn['fraud_type'] == 'account_takeover' and random.random() < 0.3:
+            if is_takeover[i] and takeover_draw[i] < 0.3:
                 # Réutiliser un device compromis existant
-                if len(self.compromised_devices) > 0 and random.random() < 0.6:
-                    device_id = random.choice(list(self.compromised_devices))
+                if compromised_devices and reuse_draw[i] < 0.6:
+                    current_device[0] = compromised_devices[int(reuse_pick[i] * len(compromised_devices))]
                 else:
-                    device_id = f'DEV_FRAUD_{len(self.compromised_devices):05d}'
-                    self.compromised_devices.add(device_id)
-                
-                customer_devices[customer_id]['device_id'] = device_id
-            
-            current_device = customer_devices[customer_id]
-            device_id = current_device['device_id']
-            
-            # Tracking usage
-            if device_id not in device_usage_count:
-                device_usage_count[device_id] = set()
-            device_usage_count[device_id].add(customer_id)
+                    current_device[0] = f'DEV_FRAUD_{len(compromised_devices):05d}'
+                    compromised_devices.append(current_device[0])
             
-            # Changement de device (suspect si fréquent)
-            device_changed = 0
-            if random.random() < 0.05:
-                device_changed = 1
-                customer_devices[customer_id] = {
-                    'device_id': f'DEV_{random.randint(100000, 999999):08d}',
-                    'os': np.random.choice(['iOS', 'Android', 'Windows', 'MacOS']),
-                    'browser': np.random.choice(['Safari', 'Chrome', 'Firefox', 'Edge'])
-                }
+            device_ids[i], device_os[i], device_browser[i] = current_device
             
-            # Fraude = plus de VPN, émulateurs
-            if txn['is_fraud']:
-                is_vpn = 1 if random.random() < 0.65 else 0
-                is_emulator = 1 if random.random() < 0.35 else 0
-            else:
-                is_vpn = 1 if random.random() < 0.08 else 0
-                is_emulator = 0
-            
-            devices.append({
-                'transaction_id': txn['transaction_id'],
-                'device_id': device_id,
-                'device_type': np.random.choice(['mobile', 'tablet', 'desktop'], p=[0.65, 0.10, 0.25]),
-                'os': current_device['os'],
-                'browser': current_device['browser'],
-                'ip_address': fake.ipv4(),
-                'is_vpn': is_vpn,
-                'is_emulator': is_emulator,
-                'device_change_24h': device_changed,
-                'screen_resolution': np.random.choice(['1920x1080', '1366x768', '375x667', '414x896']),
-                'language': 'fr-FR',
-                'timezone': 'Europe/Paris',
-                'user_agent': f"Mozilla/5.0 ({current_device['os']}) {current_device['browser']}"
-            })
-        
-        df_devices = pd.DataFrame(devices)
+            if device_changed_list[i]:
+                customer_devices[customer_id] = [
+                    f'DEV_{changed_device_num[i]:08d}', changed_os[i], changed_browser[i]
+                ]
+        
+        self.compromised_devices.update(compromised_devices)
+        
+        # Fraude = plus de VPN, émulateurs
+        is_vpn = np.where(is_fraud, vpn_draw < 0.65, vpn_draw < 0.08).astype(np.int8)
+        is_emulator = (is_fraud & (emulator_draw < 0.35)).astype(np.int8)
+        
+        device_os = pd.Series(pd.Categorical(device_os, categories=os_choices))
+        device_browser = pd.Series(pd.Categorical(device_browser, categories=browser_choices))
+        
+        df_devices = pd.DataFrame({
+            'transaction_id': transactions['transaction_id'].to_numpy(),
+            'device_id': device_ids,
+            'device_type': pd.Categorical.from_codes(
+                self._sample_cdf(self._device_type_cdf, n), categories=['mobile', 'tablet', 'desktop']
+            ),
+            'os': device_os,
+            'browser': device_browser,
+            'ip_address': self._random_ipv4(n),
+            'is_vpn': is_vpn,
+            'is_emulator': is_emulator,
+            'device_change_24h': device_changed.astype(np.int8),
+            'screen_resolution': pd.Categorical.from_codes(
+                self.rng.integers(0, 4, size=n), categories=['1920x1080', '1366x768', '375x667', '414x896']
+            ),
+            'language': 'fr-FR',
+            'timezone': 'Europe/Paris',
+            'user_agent': 'Mozilla/5.0 (' + device_os.astype(str) + ') ' + device_browser.astype(str)
+        })
         
         # Ajouter métrique de "device sharing" (réseau de fraude)
-        df_devices['device_user_count'] = df_devices['device_id'].map(
-            lambda x: len(device_usage_count.get(x, set()))
+        # (nombre de clients distincts par device, une seule agrégation groupby)
+        df_devices['device_user_count'] = (
+            transactions['customer_id'].groupby(np.asarray(device_ids)).transform('nunique').to_numpy(dtype=np.int32)
         )
         
         print(f"   ✅ {len(df_devices):,} empreintes générées")
@@ -631,54 +786,59 @@ class AdvancedBankDataSimulator:
         """
         print("\n🚨 Génération FRAUD_ALERTS_HISTORY...")
         
+        # Sélection par masques de Bernoulli sur les positions (fraudes puis légitimes)
+        is_fraud = transactions['is_fraud'].to_numpy() == 1
+        fraud_pos, legit_pos = np.flatnonzero(is_fraud), np.flatnonzero(~is_fraud)
+        
         # Ancien système détecte 65% des vraies fraudes
-        fraud_txns = transactions[transactions['is_fraud'] == 1].sample(frac=0.65)
+        fraud_pos = fraud_pos[self.rng.random(len(fraud_pos), dtype=np.float32) < 0.65]
         
         # Faux positifs : 2.5% des transactions légitimes
-        legit_txns = transactions[transactions['is_fraud'] == 0].sample(frac=0.025)
-        
-        alerted_txns = pd.concat([fraud_txns, legit_txns])
-        
-        alerts = []
-        
-        for _, txn in alerted_txns.iterrows():
-            # Temps de traitement
-            if txn['is_fraud']:
-                response_time = int(np.random.exponential(scale=45))
-            else:
-                response_time = int(np.random.exponential(scale=12))
-            
-            # Score alerte (plus élevé si vraie fraude)
-            if txn['is_fraud']:
-                alert_score = round(random.uniform(70, 98), 1)
-            else:
-                alert_score = round(random.uniform(35, 75), 1)
-            
-            alerts.append({
-                'alert_id': f'ALERT_{len(alerts)+1:08d}',
-                'transaction_id': txn['transaction_id'],
-                'customer_id': txn['customer_id'],
-                'alert_date': txn['transaction_timestamp'],
-                'alert_type': np.random.choice([
-                    'velocity', 'amount_threshold', 'geo_mismatch', 
-                    'new_merchant', 'time_anomaly', 'device_fingerprint'
-                ]),
-                'alert_score': alert_score,
-                'is_confirmed_fraud': txn['is_fraud'],
-                'fraud_type': txn['fraud_type'] if txn['is_fraud'] else None,
-                'response_time_minutes': response_time,
-                'reviewed_by': f'ANALYST_{random.randint(1, 25):02d}',
-                'resolution': 'fraud_confirmed' if txn['is_fraud'] else 'false_positive',
-                'confirmation_date': txn['transaction_timestamp'] + timedelta(
-                    days=txn['detection_delay_days'] if txn['is_fraud'] else 0
-                )
-            })
-        
-        df_alerts = pd.DataFrame(alerts)
+        legit_pos = legit_pos[self.rng.random(len(legit_pos), dtype=np.float32) < 0.025]
+        
+        idx = np.concatenate([fraud_pos, legit_pos])
+        n = len(idx)
+        is_fraud_sel = is_fraud[idx]
+        
+        # Temps de traitement
+        response_time = self.rng.exponential(scale=np.where(is_fraud_sel, 45, 12)).astype(np.int32)
+        
+        # Score alerte (plus élevé si vraie fraude)
+        alert_score = np.round(np.where(
+            is_fraud_sel, self.rng.uniform(70, 98, size=n), self.rng.uniform(35, 75, size=n)
+        ), 1).astype(np.float32)
+        
+        alert_dates = transactions['transaction_timestamp'].to_numpy()[idx]
+        
+        # Date de confirmation : délai de détection pour les fraudes, immédiate sinon (délai NA)
+        detection_delay = transactions['detection_delay_days'].take(idx).fillna(0).to_numpy()
+        
+        df_alerts = pd.DataFrame({
+            'alert_id': [f'ALERT_{i:08d}' for i in range(1, n + 1)],
+            'transaction_id': transactions['transaction_id'].to_numpy()[idx],
+            'customer_id': transactions['customer_id'].to_numpy()[idx],
+            'alert_date': alert_dates,
+            'alert_type': pd.Categorical.from_codes(
+                self.rng.integers(0, 6, size=n),
+                categories=['velocity', 'amount_threshold', 'geo_mismatch',
+                            'new_merchant', 'time_anomaly', 'device_fingerprint']
+            ),
+            'alert_score': alert_score,
+            'is_confirmed_fraud': is_fraud_sel.astype(np.int8),
+            'fraud_type': transactions['fraud_type'].take(idx).reset_index(drop=True).where(is_fraud_sel),
+            'response_time_minutes': response_time,
+            'reviewed_by': pd.Categorical.from_codes(
+                self.rng.integers(0, 25, size=n), categories=[f'ANALYST_{i:02d}' for i in range(1, 26)]
+            ),
+            'resolution': pd.Categorical.from_codes(
+                is_fraud_sel.astype(np.int8), categories=['false_positive', 'fraud_confirmed']
+            ),
+            'confirmation_date': alert_dates + pd.to_timedelta(detection_delay, unit='D').to_numpy()
+        })
         
         print(f"   ✅ {len(df_alerts):,} alertes générées")
         print(f"   ✔️  Vrais positifs : {df_alerts['is_confirmed_fraud'].sum():,}")
-        print(f"   ✖️  Faux positifs : {(~df_alerts['is_confirmed_fraud']).sum():,}")
+        print(f"   ✖️  Faux positifs : {(df_alerts['is_confirmed_fraud'] == 0).sum():,}")
         print(f"   ⏱️  Temps moyen : {df_alerts['response_time_minutes'].mean():.1f} min")
         
         return df_alerts
@@ -688,20 +848,47 @@ class AdvancedBankDataSimulator:
     # ORCHESTRATION COMPLÈTE
     # ========================================
     
-    def generate_all_tables(self, save_to_csv=True, output_dir='data'):
+    @staticmethod
+    def _optimize_dtypes(df: pd.DataFrame, table_name: str) -> pd.DataFrame:
+        """
+        Applique les types compacts de TABLE_DTYPES[table_name] (en place, avant sauvegarde).
+        
+        Le schéma est fixé dans config.py et non déduit des données : fichiers écrits,
+        relecture des CSV et setup de la base partagent les mêmes types.
+        """
+        for col, dtype in TABLE_DTYPES[table_name].items():
+            df[col] = df[col].astype(dtype)
+        return df
+    
+    
+    @staticmethod
+    def _save_table(df: pd.DataFrame, path: str, fmt: str):
+        """Écrit une table au format `fmt` ('parquet' ou 'csv')."""
+        if fmt == 'parquet':
+            # pyarrow n'est importé par pandas qu'ici (dépendance chargée à la demande)
+            df.to_parquet(path, engine='pyarrow', compression='snappy', index=False)
+        else:
+            # Écriture par lots de 50k lignes : mémoire bornée pour les grosses tables
+            df.to_csv(path, index=False, chunksize=50_000)
+    
+    
+    def generate_all_tables(self, save_to_csv=True, output_dir='data', fmt='parquet'):
         """
         Génère l'écosystème complet de données.
+        
+        Les tables sont sauvegardées (si save_to_csv) au format `fmt` :
+        'parquet' (colonnaire binaire, compression Snappy, par défaut) ou 'csv'.
         """
-        import os
+        if fmt not in ('parquet', 'csv'):
+            raise ValueError(f"Format de sauvegarde inconnu : {fmt!r} (attendu : 'parquet' ou 'csv')")
+        
+        # Créer dossier output
         os.makedirs(output_dir, exist_ok=True)
         
         print("\n" + "="*70)
         print("🚀 GÉNÉRATION ÉCOSYSTÈME BANCAIRE AVANCÉ")
         print("="*70)
         
-        # Créer dossier output
-        os.makedirs(output_dir, exist_ok=True)
-        
         # 1. Profils clients
         customers = self.generate_customer_profile()
         
@@ -717,14 +904,28 @@ class AdvancedBankDataSimulator:
         # 5. Historique alertes
         alerts = self.generate_fraud_alerts_history(transactions)
         
+        tables = {
+            'customer_profile': customers,
+            'merchant_registry': merchants,
+            'transactions': transactions,
+            'device_fingerprinting': devices,
+            'fraud_alerts_history': alerts,
+        }
+        
+        # Types compacts (mémoire, disque et relecture)
+        for table_name, df in tables.items():
+            self._optimize_dtypes(df, table_name)
+        
         # Sauvegarde
         if save_to_csv:
-            print(f"\n💾 Sauvegarde en CSV dans /{output_dir}/...")
-            customers.to_csv(f'{output_dir}/customer_profile.csv', index=False)
-            merchants.to_csv(f'{output_dir}/merchant_registry.csv', index=False)
-            transactions.to_csv(f'{output_dir}/transactions.csv', index=False)
-            devices.to_csv(f'{output_dir}/device_fingerprinting.csv', index=False)
-            alerts.to_csv(f'{output_dir}/fraud_alerts_history.csv', index=False)
+            print(f"\n💾 Sauvegarde en {fmt.upper()} dans /{output_dir}/...")
+            # Fichiers indépendants : écritures en parallèle (pyarrow relâche le GIL pendant
+            # l'encodage ; en CSV, seules les I/O disque se recouvrent)
+            with ThreadPoolExecutor(max_workers=len(tables)) as executor:
+                list(executor.map(
+                    lambda item: self._save_table(item[1], f'{output_dir}/{item[0]}.{fmt}', fmt),
+                    tables.items()
+                ))
             print("   ✅ Tous les fichiers sauvegardés")
         
         # Statistiques finales
@@ -741,35 +942,47 @@ class AdvancedBankDataSimulator:
     
     def _print_final_stats(self, customers, merchants, transactions, devices, alerts):
         """Affiche statistiques complètes."""
-        print("\n" + "="*70)
-        print("📊 STATISTIQUES FINALES")
-        print("="*70)
-        
-        print(f"\n📋 CLIENTS :")
-        print(f"   Total : {len(customers):,}")
-        print(f"   Par segment : {customers['customer_segment'].value_counts().to_dict()}")
-        
-        print(f"\n🏪 COMMERÇANTS :")
-        print(f"   Total : {len(merchants):,}")
-        print(f"   Compromis : {merchants['is_compromised'].sum()}")
-        
-        print(f"\n💳 TRANSACTIONS :")
-        print(f"   Total : {len(transactions):,}")
-        print(f"   Fraudes : {transactions['is_fraud'].sum():,} ({transactions['is_fraud'].mean()*100:.3f}%)")
-        print(f"   Montant total : {transactions['amount'].sum():,.2f}€")
-        print(f"   Montant fraudé : {transactions[transactions['is_fraud']==1]['amount'].sum():,.2f}€")
-        
-        print(f"\n📱 DEVICES :")
-        print(f"   Empreintes uniques : {devices['device_id'].nunique():,}")
-        print(f"   Devices partagés (>3 users) : {(devices['device_user_count'] > 3).sum():,}")
-        
-        print(f"\n🚨 ALERTES :")
-        print(f"   Total : {len(alerts):,}")
-        print(f"   Précision : {alerts['is_confirmed_fraud'].mean()*100:.1f}%")
+        # Sortie accumulée en mémoire puis écrite d'un bloc (un seul write/flush sur stdout)
+        buffer = io.StringIO()
+        with redirect_stdout(buffer):
+            print("\n" + "="*70)
+            print("📊 STATISTIQUES FINALES")
+            print("="*70)
+            
+            print(f"\n📋 CLIENTS :")
+            print(f"   Total : {len(customers):,}")
+            print(f"   Par segment : {customers['customer_segment'].value_counts().to_dict()}")
+            
+            print(f"\n🏪 COMMERÇANTS :")
+            print(f"   Total : {len(merchants):,}")
+            print(f"   Compromis : {merchants['is_compromised'].sum()}")
+            
+            # Réductions NumPy sur tableaux contigus (pas de copie filtrée du DataFrame) ;
+            # accumulation en float64 pour garder des totaux exacts au centime
+            amounts = transactions['amount'].to_numpy(dtype=np.float64)
+            is_fraud = transactions['is_fraud'].to_numpy(dtype=np.float64)
+            n_fraud = int(is_fraud.sum())
+            
+            print(f"\n💳 TRANSACTIONS :")
+            print(f"   Total : {len(transactions):,}")
+            print(f"   Fraudes : {n_fraud:,} ({n_fraud / max(len(transactions), 1) * 100:.3f}%)")
+            print(f"   Montant total : {amounts.sum():,.2f}€")
+            print(f"   Montant fraudé : {amounts @ is_fraud:,.2f}€")
+            
+            print(f"\n📱 DEVICES :")
+            print(f"   Empreintes uniques : {devices['device_id'].nunique():,}")
+            print(f"   Devices partagés (>3 users) : {(devices['device_user_count'] > 3).sum():,}")
+            
+            print(f"\n🚨 ALERTES :")
+            print(f"   Total : {len(alerts):,}")
+            print(f"   Précision : {alerts['is_confirmed_fraud'].mean()*100:.1f}%")
+            
+            print("\n" + "="*70)
+            print("✅ GÉNÉRATION TERMINÉE")
+            print("="*70 + "\n")
         
-        print("\n" + "="*70)
-        print("✅ GÉNÉRATION TERMINÉE")
-        print("="*70 + "\n")
+        sys.stdout.write(buffer.getvalue())
+        sys.stdout.flush()
 
 
 # ========================================
@@ -802,6 +1015,6 @@ if __name__ == "__main__":
     
     print("\n💡 Prochaines étapes suggérées :")
     print("   1. Vérifier les fichiers dans /data/")
-    print("   2. Explorer avec pandas : df = pd.read_csv('data/transactions.csv')")
+    print("   2. Explorer avec pandas : df = pd.read_parquet('data/transactions.parquet')")
     print("   3. Créer des features avancées (pipeline feature engineering)")
     print("   4. Entraîner un modèle de ML (XGBoost, Random Forest)")
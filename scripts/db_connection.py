@@ -13,13 +13,21 @@ Best practice:
 
 import sqlalchemy as sa
 from sqlalchemy import create_engine, text
+from sqlalchemy.pool import StaticPool
 from contextlib import contextmanager
+from functools import lru_cache
 import pandas as pd
 import logging
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Iterable
 import sys
 from pathlib import Path
 
+try:
+    # Optionnel : lecture SQL colonne par colonne (Arrow) pour PostgreSQL
+    import connectorx as cx
+except ImportError:
+    cx = None
+
 # Ajouter le dossier parent au path pour importer confid
 sys.path.append(str(Path(__file__).parent.parent))
 from config import DATABASE_URI, LOG_LEVEL, LOG_FORMAT
@@ -28,6 +36,13 @@ from config import DATABASE_URI, LOG_LEVEL, LOG_FORMAT
 logging.basicConfig(level=LOG_LEVEL, format=LOG_FORMAT)
 logger = logging.getLogger(__name__)
 
+
+@lru_cache(maxsize=128)
+def _compile(query: str):
+    """Construit (une seule fois par requête distincte) l'objet text() SQLAlchemy."""
+    return text(query)
+
+
 class StagingDatabase:
     """
     Gestionnaire de connexion à la base de données de staging.
@@ -48,23 +63,68 @@ class StagingDatabase:
         """
         self.database_uri = database_uri
         self.engine = None
+        self._cx_uri = self._connectorx_uri(database_uri)
         self._connect()
     
     def _connect(self):
         """Établit la connexion avec pool de connexions."""
         try:
-            # En production, on ajouterait :
-            # pool_size=10, max_overflow=20, pool_timeout=30
+            if self.database_uri.startswith('sqlite'):
+                if sa.engine.make_url(self.database_uri).database in (None, '', ':memory:'):
+                    # Base en mémoire : une seule connexion partagée (StaticPool), sinon
+                    # chaque nouvelle connexion verrait une base vide
+                    pool_options = {
+                        'connect_args': {'check_same_thread': False},
+                        'poolclass': StaticPool,
+                    }
+                else:
+                    # Fichier : pool par défaut de SQLAlchemy (QueuePool), connexions
+                    # réutilisées, chacune prêtée à un seul thread à la fois
+                    pool_options = {}
+            else:
+                # Serveur (PostgreSQL) : pool persistant, pas de handshake TCP/auth par requête
+                pool_options = {
+                    'pool_size': 10,
+                    'max_overflow': 20,
+                    'pool_timeout': 30,
+                    'pool_pre_ping': True,  # Écarte les connexions coupées par le serveur
+                    'pool_recycle': 3600,
+                }
             self.engine = create_engine(
                 self.database_uri,
                 echo=False,  # Mettre True pour debug SQL
-                future=True
+                future=True,
+                **pool_options
             )
-            logger.info(f"✅ Connexion établie à {self.database_uri}")
+            if self.database_uri.startswith('sqlite'):
+                sa.event.listen(self.engine, 'connect', self._set_sqlite_pragmas)
+            logger.info("✅ Connexion établie à %s", self.database_uri)
         except Exception as e:
-            logger.error(f"❌ Erreur de connexion : {e}")
+            logger.error("❌ Erreur de connexion : %s", e)
             raise
     
+    @staticmethod
+    def _connectorx_uri(database_uri: str) -> Optional[str]:
+        """
+        URI utilisable par connectorx (PostgreSQL uniquement), ou None.
+        
+        Le suffixe de driver SQLAlchemy (postgresql+psycopg2://) est retiré :
+        connectorx n'accepte que la forme postgresql://.
+        """
+        if cx is None:
+            return None
+        url = sa.engine.make_url(database_uri)
+        if url.get_backend_name() != 'postgresql':
+            return None
+        return url.set(drivername='postgresql').render_as_string(hide_password=False)
+    
+    @staticmethod
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        """Lectures SQLite via pages mappées en mémoire (réglage propre à chaque connexion)."""
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA mmap_size = 268435456")
+        cursor.close()
+    
     @contextmanager
     def get_connection(self):
         """
@@ -92,18 +152,57 @@ class StagingDatabase:
             DataFrame avec les résultats
         """
         try:
-            logger.info(f"🔍 Exécution requête : {query[:100]}...")
+            logger.info("🔍 Exécution requête : %s...", query[:100])
+            
+            if self._cx_uri is not None and not params:
+                # Chemin rapide : fetch colonnaire natif, sans tuples Python intermédiaires
+                try:
+                    result = cx.read_sql(self._cx_uri, query, return_type='pandas')
+                    logger.info("✅ %d lignes récupérées", len(result))
+                    return result
+                except Exception as e:
+                    logger.warning("⚠️  connectorx indisponible pour cette requête (%s), repli SQLAlchemy", e)
             
             with self.get_connection() as conn:
                 if params:
-                    result = pd.read_sql(text(query), conn, params=params)
+                    result = pd.read_sql(_compile(query), conn, params=params)
                 else:
+                    # Sans paramètres : chaîne brute, pas de compilation text() SQLAlchemy
                     result = pd.read_sql(query, conn)
             
-            logger.info(f"✅ {len(result)} lignes récupérées")
+            logger.info("✅ %d lignes récupérées", len(result))
             return result
             
         except Exception as e:
-            logger.error(f"❌ Erreur SQL : {e}")
-            logger.error(f"   Requête : {query}")
-            raise
\ No newline at end of file
+            logger.error("❌ Erreur SQL : %s", e)
+            logger.error("   Requête : %s", query)
+            raise
+    
+    def execute_many(self, query: str, params_list: Iterable[Dict[str, Any]]) -> int:
+        """
+        Exécute une requête DML pour chaque jeu de paramètres (executemany), en une transaction.
+        
+        Args:
+            query: Requête SQL avec des :param
+            params_list: Itérable de dictionnaires de paramètres
+        
+        Returns:
+            Nombre de jeux de paramètres exécutés
+        """
+        params_list = list(params_list)
+        if not params_list:
+            return 0
+        
+        try:
+            logger.info("✏️  Exécution DML (%d lignes) : %s...", len(params_list), query[:100])
+            
+            with self.engine.begin() as conn:
+                conn.execute(_compile(query), params_list)
+            
+            logger.info("✅ %d lignes traitées", len(params_list))
+            return len(params_list)
+            
+        except Exception as e:
+            logger.error("❌ Erreur SQL : %s", e)
+            logger.error("   Requête : %s", query)
+            raise
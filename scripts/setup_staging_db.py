@@ -2,40 +2,74 @@
 """
 Script de création de l'environnement de staging SQL.
 
-Transforme les fichiers CSV bruts en base de données relationnelle
+Transforme les fichiers bruts (Parquet ou CSV) en base de données relationnelle
 avec index, contraintes et métadonnées.
 
 Usage:
     python scripts/setup_staging_db.py
 """
 
+import io
+import itertools
+import os
 import pandas as pd
 import sqlite3
 import logging
 from pathlib import Path
+from contextlib import redirect_stdout
 import sys
 from datetime import datetime
+from typing import NamedTuple
 
 # Ajouter le dossier parent au path
 sys.path.append(str(Path(__file__).parent.parent))
-from config import DATA_DIR, DATABASE_PATH, TABLES, LOG_LEVEL, LOG_FORMAT
+from config import DATA_DIR, DATABASE_PATH, TABLES, TABLE_DTYPES, LOG_LEVEL, LOG_FORMAT
 
 # Configuration logging
 logging.basicConfig(level=LOG_LEVEL, format=LOG_FORMAT)
 logger = logging.getLogger(__name__)
 
 
+class TableStat(NamedTuple):
+    """Statistiques d'import d'une table (tuple léger, sans dict par instance)."""
+    rows: int
+    columns: int
+    size_mb: float
+
+
 class StagingDatabaseSetup:
     """
     Gestionnaire de création de la base de données de staging.
     
     Fonctionnalités :
-    - Import des CSV
+    - Import des fichiers Parquet / CSV
     - Création des index
     - Validation des données
     - Génération de statistiques
     """
     
+    # PRAGMAs de chargement en masse : ni fsync ni journal disque pendant l'import.
+    # Ils ne valent que pour la connexion de setup (rien n'est persisté dans le fichier) ;
+    # la base est basculée en WAL une fois le setup terminé (cf. enable_wal).
+    BULK_LOAD_PRAGMAS = (
+        "PRAGMA synchronous = OFF",
+        "PRAGMA journal_mode = MEMORY",
+        "PRAGMA temp_store = MEMORY",
+        "PRAGMA cache_size = -262144",  # 256 Mo de cache de pages
+    )
+    
+    # Clés primaires déclarées dans le DDL (index B-tree unique créé par SQLite)
+    PRIMARY_KEYS = {
+        'customer_profile': 'customer_id',
+        'merchant_registry': 'merchant_id',
+        'transactions': 'transaction_id',
+        'device_fingerprinting': 'transaction_id',  # Une empreinte par transaction
+        'fraud_alerts_history': 'alert_id',
+    }
+    
+    # Taille des lots lus puis insérés par import_table
+    IMPORT_CHUNKSIZE = 50_000
+    
     def __init__(self, data_dir: Path = DATA_DIR, db_path: Path = DATABASE_PATH):
         self.data_dir = data_dir
         self.db_path = db_path
@@ -44,48 +78,167 @@ class StagingDatabaseSetup:
     
     def connect(self):
         """Établit la connexion à la base."""
-        logger.info(f"📂 Connexion à {self.db_path}")
+        logger.info("📂 Connexion à %s", self.db_path)
         self.conn = sqlite3.connect(self.db_path)
         self.conn.execute("PRAGMA foreign_keys = ON")  # Activer les contraintes FK
+        self.conn.execute("PRAGMA page_size = 8192")  # Sans effet si la base contient déjà des tables
+        self.conn.execute("PRAGMA mmap_size = 268435456")  # Lectures via pages mappées (256 Mo)
+        for pragma in self.BULK_LOAD_PRAGMAS:
+            self.conn.execute(pragma)
+    
+    def enable_wal(self):
+        """
+        Passe la base en journal WAL (réglage persisté dans le fichier).
+        
+        Les lecteurs (notebooks, db_connection) ne bloquent plus sur un écrivain.
+        Le mode WAL crée les fichiers annexes shield_staging.db-wal et -shm.
+        """
+        mode = self.conn.execute("PRAGMA journal_mode = WAL").fetchone()[0]
+        logger.info("📓 Journal SQLite : %s", mode)
     
-    def import_table(self, table_name: str, csv_filename: str) -> bool:
+    @staticmethod
+    def _to_sqlite_rows(chunk: pd.DataFrame):
         """
-        Import une table depuis un CSV.
+        Convertit un lot en tuples de valeurs Python natives liables par sqlite3.
+        
+        Valeurs manquantes -> None ; timestamps -> texte au format de to_sql
+        (datetime.isoformat(' ') : 'AAAA-MM-JJ HH:MM:SS', suivi de '.ffffff' si la valeur
+        a des microsecondes), décidé valeur par valeur et donc indépendant du lot ;
+        float32 -> float64 via leur représentation décimale la plus courte
+        (SQLite stocke des REAL 64 bits : 78.82 et non 78.81999969482422).
+        """
+        missing = chunk.isna()
+        chunk = chunk.copy()
+        for col in chunk.select_dtypes(include='float32').columns:
+            chunk[col] = chunk[col].astype(str).astype('float64')
+        for col in chunk.select_dtypes(include='datetime').columns:
+            values = chunk[col].dt
+            chunk[col] = values.strftime('%Y-%m-%d %H:%M:%S.%f').where(
+                values.microsecond != 0, values.strftime('%Y-%m-%d %H:%M:%S')
+            )
+        return chunk.astype(object).mask(missing, None).itertuples(index=False, name=None)
+    
+    @staticmethod
+    def _csv_to_parquet(table_name: str, csv_path: Path, parquet_path: Path):
+        """
+        Convertit un CSV en Parquet (lecteur CSV multithreadé de pyarrow).
+        
+        Les types compacts de TABLE_DTYPES sont appliqués avant l'écriture, pour que
+        le Parquet produit se relise comme une sortie Parquet du simulateur.
+        Écriture dans un fichier temporaire du même dossier puis os.replace : une
+        conversion interrompue ne laisse jamais de cache partiel.
+        """
+        import pyarrow as pa  # Dépendance chargée à la demande
+        import pyarrow.csv as pacsv
+        
+        dtypes = dict(TABLE_DTYPES.get(table_name, {}))
+        # Catégories lues comme texte dictionnaire (mcc_code reste '5411', pas 5411) ;
+        # champs vides -> null, comme pd.read_csv
+        convert_options = pacsv.ConvertOptions(
+            column_types={col: pa.dictionary(pa.int32(), pa.string())
+                          for col, dtype in dtypes.items() if dtype == 'category'},
+            strings_can_be_null=True
+        )
+        table = pacsv.read_csv(csv_path,
+                               read_options=pacsv.ReadOptions(use_threads=True, block_size=64 << 20),
+                               convert_options=convert_options)
+        df = table.to_pandas(self_destruct=True).astype(dtypes)
+        tmp_path = parquet_path.with_name(f'.{parquet_path.name}.{os.getpid()}.tmp')
+        try:
+            df.to_parquet(tmp_path, engine='pyarrow', compression='snappy', index=False)
+            os.replace(tmp_path, parquet_path)
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
+    
+    def import_table(self, table_name: str, filename: str) -> bool:
+        """
+        Import une table depuis un Parquet (converti depuis le CSV si besoin).
+        
+        Le fichier Parquet déclaré dans TABLES est utilisé s'il est au moins aussi récent
+        que le CSV de même nom ; sinon le CSV est d'abord converti en Parquet, qui
+        sert de cache aux imports suivants.
         
         Args:
             table_name: Nom de la table SQL
-            csv_filename: Nom du fichier CSV
+            filename: Nom du fichier Parquet (cf. TABLES)
         
         Returns:
             True si succès
         """
-        csv_path = self.data_dir / csv_filename
+        data_path = self.data_dir / filename
+        csv_path = data_path.with_suffix('.csv')
         
-        if not csv_path.exists():
-            logger.error(f"❌ Fichier introuvable : {csv_path}")
+        if not data_path.exists() and not csv_path.exists():
+            logger.error("❌ Fichier introuvable : %s (ni %s)", data_path, csv_path.name)
             return False
         
         try:
-            logger.info(f"📥 Import de {table_name}...")
+            logger.info("📥 Import de %s...", table_name)
             
-            # Lecture CSV
-            df = pd.read_csv(csv_path)
+            # Cache Parquet absent ou plus ancien que le CSV : le CSV est la source,
+            # converti au préalable ; sinon le Parquet est lu tel quel
+            if csv_path.exists() and (not data_path.exists()
+                                      or data_path.stat().st_mtime < csv_path.stat().st_mtime):
+                source_path = csv_path
+                logger.info("   🔄 Conversion %s -> %s", csv_path.name, data_path.name)
+                self._csv_to_parquet(table_name, csv_path, data_path)
+            else:
+                source_path = data_path
             
-            # Import dans SQLite
-            df.to_sql(table_name, self.conn, if_exists='replace', index=False)
+            # Lecture par lots (mémoire bornée, une seule passe)
+            import pyarrow.parquet as pq  # Dépendance chargée à la demande
+            parquet_file = pq.ParquetFile(data_path)
+            batches = parquet_file.iter_batches(batch_size=self.IMPORT_CHUNKSIZE)
+            first_batch = next(batches, None)
+            if first_batch is None:
+                # Fichier sans lignes : schéma seul, la table est tout de même créée
+                schema_df = parquet_file.schema_arrow.empty_table().to_pandas()
+                chunks = []
+            else:
+                schema_df = first_batch.to_pandas()
+                chunks = itertools.chain([schema_df], (batch.to_pandas() for batch in batches))
             
-            # Statistiques
-            self.stats[table_name] = {
-                'rows': len(df),
-                'columns': len(df.columns),
-                'size_mb': csv_path.stat().st_size / (1024 * 1024)
-            }
+            # Import dans SQLite : table recréée avec sa PRIMARY KEY (DDL déduit du premier
+            # lot), puis remplie par executemany dans une seule transaction
+            # (l'unicité de la clé est vérifiée à l'insertion, sans index séparé)
+            columns = list(schema_df.columns)
+            insert_sql = f'INSERT INTO "{table_name}" VALUES ({", ".join("?" * len(columns))})'
+            self.conn.execute(f'DROP TABLE IF EXISTS "{table_name}"')
+            self.conn.execute(pd.io.sql.get_schema(
+                schema_df, table_name, keys=self.PRIMARY_KEYS.get(table_name), con=self.conn
+            ))
+            n_rows = 0
+            try:
+                for chunk in chunks:
+                    self.conn.executemany(insert_sql, self._to_sqlite_rows(chunk))
+                    n_rows += len(chunk)
+                self.conn.commit()
+            except Exception:
+                self.conn.rollback()
+                raise
             
-            logger.info(f"   ✅ {len(df):,} lignes importées ({len(df.columns)} colonnes)")
+            # Statistiques (taille du fichier source retenu ci-dessus : le CSV converti,
+            # ou le Parquet plus récent que l'éventuel CSV)
+            self.stats[table_name] = TableStat(
+                rows=n_rows,
+                columns=len(columns),
+                size_mb=source_path.stat().st_size / (1024 * 1024)
+            )
+            
+            logger.info("   ✅ %d lignes importées (%d colonnes)", n_rows, len(columns))
             return True
             
+        except sqlite3.IntegrityError as e:
+            # Doublon sur la PRIMARY KEY : import annulé, doublons comptés dans le fichier source
+            key = self.PRIMARY_KEYS.get(table_name)
+            ids = pq.read_table(data_path, columns=[key]).column(key).to_pandas()
+            logger.error("❌ Unicité %s : %d doublons dans %s, import annulé (%s)",
+                         key, int(ids.duplicated().sum()), table_name, e)
+            return False
+            
         except Exception as e:
-            logger.error(f"❌ Erreur import {table_name} : {e}")
+            logger.error("❌ Erreur import %s : %s", table_name, e)
             return False
     
     def create_indexes(self):
@@ -96,15 +249,14 @@ class StagingDatabaseSetup:
         """
         logger.info("🔧 Création des index...")
         
+        # Une seule transaction pour tous les index (un commit au lieu d'un par index)
+        self.conn.execute("BEGIN")
+        
         indexes = [
-            # Clés primaires
-            "CREATE INDEX IF NOT EXISTS idx_customer_id ON customer_profile(customer_id)",
-            "CREATE INDEX IF NOT EXISTS idx_merchant_id ON merchant_registry(merchant_id)",
-            "CREATE INDEX IF NOT EXISTS idx_transaction_id ON transactions(transaction_id)",
-            "CREATE INDEX IF NOT EXISTS idx_device_txn ON device_fingerprinting(transaction_id)",
-            "CREATE INDEX IF NOT EXISTS idx_alert_txn ON fraud_alerts_history(transaction_id)",
+            # Clés primaires : déclarées dans le DDL de import_table (PRIMARY_KEYS)
             
             # Clés étrangères (pour JOINs)
+            "CREATE INDEX IF NOT EXISTS idx_alert_txn ON fraud_alerts_history(transaction_id)",
             "CREATE INDEX IF NOT EXISTS idx_txn_customer ON transactions(customer_id)",
             "CREATE INDEX IF NOT EXISTS idx_txn_merchant ON transactions(merchant_id)",
             "CREATE INDEX IF NOT EXISTS idx_alert_customer ON fraud_alerts_history(customer_id)",
@@ -120,9 +272,9 @@ class StagingDatabaseSetup:
         for idx_query in indexes:
             try:
                 self.conn.execute(idx_query)
-                logger.info(f"   ✅ {idx_query.split('idx_')[1].split(' ')[0]}")
+                logger.info("   ✅ %s", idx_query.split('idx_')[1].split(' ')[0])
             except Exception as e:
-                logger.warning(f"   ⚠️  Index déjà existant ou erreur : {e}")
+                logger.warning("   ⚠️  Index déjà existant ou erreur : %s", e)
         
         self.conn.commit()
         logger.info("✅ Index créés")
@@ -138,52 +290,59 @@ class StagingDatabaseSetup:
         """
         logger.info("🔍 Validation de la qualité des données...")
         
-        # Check 1 : Clés primaires uniques
+        # Statistiques pour le planificateur (plan des LEFT JOIN des checks FK)
+        self.conn.execute("ANALYZE")
+        
+        # Checks : (nom, sous-requête scalaire, compteur d'anomalies ?), évalués en une seule requête
+        # L'unicité des clés primaires n'est pas recontrôlée ici : la PRIMARY KEY du DDL la
+        # garantit, et un doublon fait échouer import_table (erreur « Unicité »)
         checks = [
-            ("Unicité customer_id", 
-             "SELECT COUNT(*) - COUNT(DISTINCT customer_id) as dups FROM customer_profile"),
-            
-            ("Unicité merchant_id", 
-             "SELECT COUNT(*) - COUNT(DISTINCT merchant_id) as dups FROM merchant_registry"),
-            
-            ("Unicité transaction_id", 
-             "SELECT COUNT(*) - COUNT(DISTINCT transaction_id) as dups FROM transactions"),
-            
-            # Check 2 : Foreign keys
+            # Check 1 : Foreign keys
             ("Cohérence FK customer", 
-             """SELECT COUNT(*) as orphans 
+             """SELECT COUNT(*) 
                 FROM transactions t 
                 LEFT JOIN customer_profile c ON t.customer_id = c.customer_id 
-                WHERE c.customer_id IS NULL"""),
+                WHERE c.customer_id IS NULL""", True),
             
             ("Cohérence FK merchant", 
-             """SELECT COUNT(*) as orphans 
+             """SELECT COUNT(*) 
                 FROM transactions t 
                 LEFT JOIN merchant_registry m ON t.merchant_id = m.merchant_id 
-                WHERE m.merchant_id IS NULL"""),
+                WHERE m.merchant_id IS NULL""", True),
             
-            # Check 3 : Distribution labels
+            # Check 2 : Distribution labels
             ("Taux de fraude", 
-             "SELECT AVG(is_fraud) * 100 as fraud_pct FROM transactions"),
+             "SELECT COALESCE(AVG(is_fraud), 0) * 100 FROM transactions", False),  # 0 si table vide
         ]
         
+        query = "SELECT " + ",\n       ".join(f"({sql})" for _, sql, _ in checks)
+        failed = object()  # Marqueur d'un check en erreur (déjà journalisé)
+        try:
+            results = self.conn.execute(query).fetchone()
+        except Exception as e:
+            # Une sous-requête en erreur fait échouer toute la requête : on rejoue les
+            # checks un par un pour isoler l'erreur, sans perdre les autres résultats
+            logger.warning("   ⚠️  Requête groupée en échec (%s), checks exécutés un par un", e)
+            results = []
+            for check_name, sql, _ in checks:
+                try:
+                    results.append(self.conn.execute(sql).fetchone()[0])
+                except Exception as e:
+                    logger.error("   ❌ Erreur check %s : %s", check_name, e)
+                    results.append(failed)
+        
         all_valid = True
-        for check_name, query in checks:
-            try:
-                cursor = self.conn.execute(query)
-                result = cursor.fetchone()[0]
-                
-                if 'dups' in query or 'orphans' in query:
-                    if result == 0:
-                        logger.info(f"   ✅ {check_name} : OK")
-                    else:
-                        logger.error(f"   ❌ {check_name} : {result} problèmes")
-                        all_valid = False
-                else:
-                    logger.info(f"   ℹ️  {check_name} : {result:.3f}%")
-            except Exception as e:
-                logger.error(f"   ❌ Erreur check {check_name} : {e}")
+        for (check_name, _, is_anomaly_count), result in zip(checks, results):
+            if result is failed:
                 all_valid = False
+            elif is_anomaly_count:
+                if result == 0:
+                    logger.info("   ✅ %s : OK", check_name)
+                else:
+                    logger.error("   ❌ %s : %s problèmes", check_name, result)
+                    all_valid = False
+            else:
+                logger.info("   ℹ️  %s : %.3f%%", check_name, result)
         
         return all_valid
     
@@ -195,45 +354,53 @@ class StagingDatabaseSetup:
         """
         logger.info("📝 Génération des métadonnées...")
         
-        metadata = {
-            'table_name': [],
-            'row_count': [],
-            'column_count': [],
-            'size_mb': [],
-            'created_at': []
-        }
-        
-        for table_name, stats in self.stats.items():
-            metadata['table_name'].append(table_name)
-            metadata['row_count'].append(stats['rows'])
-            metadata['column_count'].append(stats['columns'])
-            metadata['size_mb'].append(round(stats['size_mb'], 2))
-            metadata['created_at'].append(datetime.now().isoformat())
+        created_at = datetime.now().isoformat()
+        rows = [
+            (table_name, stats.rows, stats.columns, round(stats.size_mb, 2), created_at)
+            for table_name, stats in self.stats.items()
+        ]
         
-        df_metadata = pd.DataFrame(metadata)
-        df_metadata.to_sql('_metadata', self.conn, if_exists='replace', index=False)
+        # Quelques lignes : insertion directe, sans DataFrame intermédiaire
+        self.conn.executescript("""
+            DROP TABLE IF EXISTS _metadata;
+            CREATE TABLE _metadata (
+                table_name TEXT,
+                row_count INTEGER,
+                column_count INTEGER,
+                size_mb REAL,
+                created_at TEXT
+            );
+        """)
+        self.conn.executemany("INSERT INTO _metadata VALUES (?, ?, ?, ?, ?)", rows)
+        self.conn.commit()
         
         logger.info("✅ Métadonnées sauvegardées dans table '_metadata'")
     
     def print_summary(self):
         """Affiche un résumé de l'environnement créé."""
-        print("\n" + "="*70)
-        print("📊 RÉSUMÉ DE L'ENVIRONNEMENT DE STAGING")
-        print("="*70)
-        print(f"\n📂 Base de données : {self.db_path}")
-        print(f"📅 Date de création : {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-        print(f"\n📋 Tables importées :")
-        
-        total_rows = 0
-        total_size = 0
-        
-        for table_name, stats in self.stats.items():
-            print(f"   • {table_name:30s} : {stats['rows']:>10,} lignes  |  {stats['columns']:>2} colonnes  |  {stats['size_mb']:>6.2f} MB")
-            total_rows += stats['rows']
-            total_size += stats['size_mb']
-        
-        print(f"\n💾 Total : {total_rows:,} lignes | {total_size:.2f} MB")
-        print("="*70 + "\n")
+        # Sortie accumulée en mémoire puis écrite d'un bloc (un seul write/flush sur stdout)
+        buffer = io.StringIO()
+        with redirect_stdout(buffer):
+            print("\n" + "="*70)
+            print("📊 RÉSUMÉ DE L'ENVIRONNEMENT DE STAGING")
+            print("="*70)
+            print(f"\n📂 Base de données : {self.db_path}")
+            print(f"📅 Date de création : {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+            print(f"\n📋 Tables importées :")
+            
+            total_rows = 0
+            total_size = 0
+            
+            for table_name, stats in self.stats.items():
+                print(f"   • {table_name:30s} : {stats.rows:>10,} lignes  |  {stats.columns:>2} colonnes  |  {stats.size_mb:>6.2f} MB")
+                total_rows += stats.rows
+                total_size += stats.size_mb
+            
+            print(f"\n💾 Total : {total_rows:,} lignes | {total_size:.2f} MB")
+            print("="*70 + "\n")
+        
+        sys.stdout.write(buffer.getvalue())
+        sys.stdout.flush()
     
     def setup(self):
         """Pipeline complet de setup."""
@@ -244,8 +411,8 @@ class StagingDatabaseSetup:
         
         # 2. Import des tables
         all_imported = True
-        for table_name, csv_filename in TABLES.items():
-            if not self.import_table(table_name, csv_filename):
+        for table_name, filename in TABLES.items():
+            if not self.import_table(table_name, filename):
                 all_imported = False
         
         if not all_imported:
@@ -265,7 +432,8 @@ class StagingDatabaseSetup:
         # 6. Résumé
         self.print_summary()
         
-        # 7. Fermeture
+        # 7. Journal WAL pour les lecteurs, puis fermeture
+        self.enable_wal()
         self.conn.close()
         
         logger.info("✅ Setup terminé avec succès")
@@ -278,9 +446,9 @@ def main():
     print("🏗️  SETUP ENVIRONNEMENT DE STAGING - PROJET SHIELD")
     print("="*70 + "\n")
     
-    # Vérification que les CSV existent
+    # Vérification que les fichiers de données existent
     if not DATA_DIR.exists():
-        logger.error(f"❌ Dossier {DATA_DIR} introuvable")
+        logger.error("❌ Dossier %s introuvable", DATA_DIR)
         logger.info("💡 Conseil : Exécuter d'abord le simulateur de données")
         return
     